@@ -0,0 +1,18 @@
+"""Load the project .env file (local development).
+
+Imported by every module that reads configuration from the environment; Python's
+import cache makes sure the file is only stat'd and parsed once per process, and the
+_DOTENV_LOADED sentinel skips it in child processes (reload/worker forks) that
+inherit the already-loaded environment.
+"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+if os.environ.get("_DOTENV_LOADED") != "1":
+    env_path = Path(__file__).parent.parent / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+    os.environ["_DOTENV_LOADED"] = "1"
@@ -1,156 +1,653 @@
 """Authentication utilities for extracting user ID from Firebase tokens."""
 
+import asyncio
+import base64
+import hashlib
+import json
 import logging
+import os
+import re
+import threading
+import time
+import urllib.request
 from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException, status
+from cachetools import TTLCache
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 logger = logging.getLogger(__name__)
 
-# Try to import and initialize Firebase Admin SDK
-FIREBASE_AVAILABLE = False
+# Prefer pybase64 (SIMD base64 decoding) for JWT segments, falling back to the stdlib
+try:
+    import pybase64 as _base64
+except ImportError:
+    _base64 = base64
+
+# Firebase Admin SDK is imported and initialized on the first token that needs verifying
+# (see _ensure_firebase), so cold starts and unauthenticated requests never load it
 auth = None
 firebase_admin = None
+_firebase_ready = False
+_firebase_failed = False
+_firebase_lock = threading.Lock()
 
-try:
-    import firebase_admin
-    from firebase_admin import auth, credentials
+# Firebase ID tokens are signed by Google's securetoken service account
+_GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+_FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+# JWT shape: base64url header and payload, and a base64url signature (empty for
+# unsigned Auth emulator tokens)
+_JWT_PATTERN = re.compile(r"([A-Za-z0-9_-]+)\.([A-Za-z0-9_-]+)\.([A-Za-z0-9_-]*)")
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+_DEFAULT_CERTS_MAX_AGE_SECONDS = 3600
+# Background refresh cadence, and the minimum gap between inline fetch attempts
+_CERTS_REFRESH_INTERVAL_SECONDS = 30 * 60
+_CERTS_MIN_REFRESH_INTERVAL_SECONDS = 60
+
+# Parsed Google public keys (kid -> key). Kept warm by refresh_google_public_keys_loop(),
+# refreshed inline only if the Cache-Control max-age lapses or a key rotates in early.
+# The attempt time is recorded whether or not the fetch succeeds, so a Google outage
+# is retried at most once per interval while the previous keys stay in use.
+_google_public_keys: dict[str, RSAPublicKey] = {}
+_google_public_keys_expire_at = 0.0
+_google_public_keys_attempted_at = 0.0
+_google_public_keys_lock = threading.Lock()
+
+# (status_code, detail) of fixed-detail failures. Raised via _http_error() as a fresh
+# HTTPException each time: a shared instance would carry one request's traceback and
+# __context__ (with its frames and token) into the next, and be mutated concurrently.
+_ERR_FIREBASE_UNAVAILABLE = (
+    status.HTTP_500_INTERNAL_SERVER_ERROR,
+    "Firebase authentication not available on server. Check server logs for details.",
+)
+_ERR_MISSING_USER_ID = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Firebase token missing user ID",
+)
+_ERR_MALFORMED_TOKEN = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Invalid token format: token appears to be truncated or malformed. Please ensure you're using a complete Firebase ID token.",
+)
+_ERR_MISSING_TOKEN = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Missing authentication token",
+)
+_ERR_INVALID_FORMAT = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Invalid token format: token must be a valid JWT",
+)
+_ERR_NOT_FIREBASE_TOKEN = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Invalid token: not a Firebase ID token",
+)
+_ERR_TOKEN_EXPIRED = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Invalid token: Token expired",
+)
+_ERR_AUTH_REQUIRED = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Authentication required",
+)
+_ERR_VERIFICATION_FAILED = (
+    status.HTTP_401_UNAUTHORIZED,
+    "Firebase token verification failed",
+)
+
+
+def _http_error(error: tuple[int, str]) -> HTTPException:
+    """Build a new HTTPException from one of the _ERR_* constants."""
+    status_code, detail = error
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+# Cache of verified tokens: blake2b(token) -> (user_id, exp).
+# Entries live at most _TOKEN_CACHE_TTL_SECONDS and never past the token's own exp claim,
+# so repeat requests with the same token skip signature verification entirely.
+_TOKEN_CACHE_TTL_SECONDS = 300
+_TOKEN_CACHE: TTLCache = TTLCache(maxsize=10000, ttl=_TOKEN_CACHE_TTL_SECONDS)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+
+def _token_cache_key(token: str) -> bytes:
+    """Hash a raw token into a compact cache key (never store tokens themselves)."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _get_cached_user_id(key: bytes) -> str | None:
+    """Return the cached user_id for a token key, or None if missing or expired."""
+    with _TOKEN_CACHE_LOCK:
+        entry = _TOKEN_CACHE.get(key)
+        if entry is None:
+            return None
+        user_id, exp = entry
+        if exp <= time.time():
+            _TOKEN_CACHE.pop(key, None)
+            return None
+        return user_id
 
-    # Initialize Firebase Admin SDK (uses Application Default Credentials on GCP)
-    if not firebase_admin._apps:
+
+def _cache_user_id(key: bytes, user_id: str, exp: float) -> None:
+    """Cache a verified user_id until min(token exp, cache TTL)."""
+    if exp <= time.time():
+        return
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[key] = (user_id, exp)
+
+
+def _invalidate_cached_token(key: bytes) -> None:
+    """Drop a token from the verification cache."""
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE.pop(key, None)
+
+
+class _ExpiredTokenError(ValueError):
+    """Raised when an otherwise valid ID token is past its exp claim."""
+
+
+def _b64url_decode(segment: str) -> bytes:
+    """Decode a base64url JWT segment, restoring the stripped padding."""
+    return _base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode_jwt_segment(segment: str) -> dict:
+    """Decode one base64url JWT segment (header or payload) without verifying it.
+
+    Raises:
+        ValueError: If the segment is not base64url-encoded JSON object
+    """
+    try:
+        # binascii/Unicode/JSON decode errors are all ValueErrors already
+        decoded = json.loads(_b64url_decode(segment))
+    except RecursionError:
+        # Deeply nested arrays/objects: just another undecodable segment
+        raise ValueError("JWT segment is nested too deeply") from None
+    if not isinstance(decoded, dict):
+        raise ValueError("JWT segment is not a JSON object")
+    return decoded
+
+
+def _ensure_firebase() -> bool:
+    """Import and initialize the Firebase Admin SDK on first use.
+
+    Uses Application Default Credentials on GCP. A failed import or initialization
+    is logged once and not retried.
+
+    Returns:
+        True if Firebase authentication is available
+    """
+    global auth, firebase_admin, _firebase_ready, _firebase_failed
+
+    if _firebase_ready:
+        return True
+
+    with _firebase_lock:
+        if _firebase_ready or _firebase_failed:
+            return _firebase_ready
         try:
-            firebase_admin.initialize_app()
-            logger.info("✅ Firebase Admin SDK initialized successfully")
+            import firebase_admin as _firebase_admin
+            from firebase_admin import auth as _auth
+
+            if not _firebase_admin._apps:
+                _firebase_admin.initialize_app()
+                logger.info("✅ Firebase Admin SDK initialized successfully")
+        except ImportError as e:
+            logger.error("❌ Firebase Admin SDK not installed: %s", e)
+            _firebase_failed = True
+            return False
         except Exception as e:
-            logger.error(f"❌ Failed to initialize Firebase Admin SDK: {e}", exc_info=True)
-            raise
-    FIREBASE_AVAILABLE = True
-    logger.info("✅ Firebase authentication available")
-except ImportError as e:
-    logger.error(f"❌ Firebase Admin SDK not installed: {e}")
-    FIREBASE_AVAILABLE = False
-    auth = None
-except Exception as e:
-    logger.error(f"❌ Firebase Admin SDK initialization failed: {e}", exc_info=True)
-    FIREBASE_AVAILABLE = False
-    auth = None
-
-# Create security scheme that doesn't require auth (auto_error=False)
-security = HTTPBearer(auto_error=False)
+            logger.error("❌ Firebase Admin SDK initialization failed: %s", e, exc_info=True)
+            _firebase_failed = True
+            return False
 
+        firebase_admin = _firebase_admin
+        auth = _auth
+        _firebase_ready = True
+        logger.info("✅ Firebase authentication available")
+        return True
 
-def get_user_id_optional(
-    credentials: HTTPAuthorizationCredentials | None = Depends(security),
-) -> Optional[str]:
-    """Extract and validate user_id from Firebase ID token (optional).
 
-    Returns None if no token provided (allows unauthenticated access).
+def _is_auth_emulator() -> bool:
+    """Check whether tokens come from the Firebase Auth emulator (unsigned tokens)."""
+    return bool(os.getenv("FIREBASE_AUTH_EMULATOR_HOST"))
 
-    Args:
-        credentials: HTTP Bearer token from Authorization header (optional)
+
+def _is_firebase_header(header: dict) -> bool:
+    """Check whether an unverified JWT header could belong to a Firebase ID token.
+
+    Firebase ID tokens are always RS256-signed with a Google key ID (a non-empty string;
+    anything else would be looked up in the key cache as-is). The Auth emulator issues
+    unsigned tokens, so any header is accepted when it is configured.
+    """
+    if _is_auth_emulator():
+        return True
+    kid = header.get("kid")
+    return header.get("alg") == "RS256" and isinstance(kid, str) and bool(kid)
+
+
+def _fetch_google_public_keys() -> tuple[dict[str, RSAPublicKey], float]:
+    """Fetch Google's x509 signing certificates for Firebase ID tokens.
 
     Returns:
-        user_id: User identifier (Firebase UID), or None if no token provided
+        Tuple of (kid -> public key, expiry timestamp from Cache-Control max-age)
+    """
+    with urllib.request.urlopen(_GOOGLE_CERTS_URL, timeout=10) as response:
+        certificates = json.loads(response.read())
+        cache_control = response.headers.get("Cache-Control", "")
 
-    Raises:
-        HTTPException: If token is invalid or expired (only if token is provided)
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    max_age = int(match.group(1)) if match else _DEFAULT_CERTS_MAX_AGE_SECONDS
+    keys = {
+        kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+        for kid, pem in certificates.items()
+    }
+    logger.info("Fetched %d Google public keys (max-age=%ds)", len(keys), max_age)
+    return keys, time.time() + max_age
+
+
+def _google_public_keys_need_refresh(kid: str | None = None) -> bool:
+    """Check whether the cached keys have expired, or lack a key ID seen in a token.
+
+    Fetches are attempted at most once per _CERTS_MIN_REFRESH_INTERVAL_SECONDS, so
+    neither forged kids nor a failing certificate endpoint can cause a fetch storm.
     """
-    if not credentials:
-        return None
+    now = time.time()
+    if now - _google_public_keys_attempted_at < _CERTS_MIN_REFRESH_INTERVAL_SECONDS:
+        return False
+    return now >= _google_public_keys_expire_at or (
+        kid is not None and kid not in _google_public_keys
+    )
 
-    token = credentials.credentials
 
-    # Clean and validate token format
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing authentication token",
+def _refresh_google_public_keys_locked() -> None:
+    """Fetch and swap in Google's current public keys (caller holds the lock).
+
+    On failure the previous keys are left in place and the exception propagates.
+    """
+    global _google_public_keys, _google_public_keys_expire_at, _google_public_keys_attempted_at
+
+    _google_public_keys_attempted_at = time.time()
+    _google_public_keys, _google_public_keys_expire_at = _fetch_google_public_keys()
+
+
+def refresh_google_public_keys() -> None:
+    """Fetch Google's current public keys and swap them into the cache."""
+    with _google_public_keys_lock:
+        _refresh_google_public_keys_locked()
+
+
+async def refresh_google_public_keys_loop() -> None:
+    """Keep Google's public keys warm so token verification never fetches them inline.
+
+    Runs until cancelled; intended to be started from the app lifespan.
+    """
+    if _is_auth_emulator():
+        return  # Emulator tokens are unsigned
+
+    while True:
+        try:
+            await asyncio.to_thread(refresh_google_public_keys)
+        except Exception as e:
+            logger.error("❌ Failed to refresh Google public keys: %s", e, exc_info=True)
+        remaining = _google_public_keys_expire_at - time.time()
+        await asyncio.sleep(
+            max(
+                _CERTS_MIN_REFRESH_INTERVAL_SECONDS,
+                min(_CERTS_REFRESH_INTERVAL_SECONDS, remaining),
+            )
         )
 
-    # Remove any whitespace
-    token = token.strip()
 
-    # Basic validation: Firebase tokens are JWTs with 3 parts separated by dots
-    parts = token.split('.')
-    if len(parts) != 3:
-        logger.warning(f"Invalid token format: expected 3 parts, got {len(parts)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token format: token must be a valid JWT",
+def _get_google_public_key(kid: str) -> RSAPublicKey:
+    """Get the Google public key for a key ID, refreshing inline only when needed.
+
+    Raises:
+        ValueError: If no current Google key matches the key ID
+    """
+    if _google_public_keys_need_refresh(kid):
+        with _google_public_keys_lock:
+            if _google_public_keys_need_refresh(kid):
+                try:
+                    _refresh_google_public_keys_locked()
+                except Exception as e:
+                    # Keep verifying against the previous keys until a retry succeeds
+                    logger.warning(
+                        "Failed to fetch Google public keys, keeping %d cached keys: %s",
+                        len(_google_public_keys),
+                        e,
+                    )
+
+    public_key = _google_public_keys.get(kid)
+    if public_key is None:
+        raise ValueError(f"Token signed by unknown key ID: {kid}")
+    return public_key
+
+
+def _verify_firebase_token(
+    parts: tuple[str, str, str], header: dict, claims: dict, project_id: str
+) -> dict:
+    """Verify a Firebase ID token offline against Google's cached public keys.
+
+    Performs the same checks as firebase_admin.auth.verify_id_token, but reuses the
+    already-split token and decoded header/payload so the RSA verify is the only real cost.
+
+    Args:
+        parts: Token split into header, payload, and signature segments
+        header: Decoded JWT header
+        claims: Decoded (not yet trusted) JWT payload
+        project_id: Firebase project ID (expected audience)
+
+    Returns:
+        Decoded token claims, with "uid" set to the subject
+
+    Raises:
+        ValueError: If the token is malformed, has an invalid signature, or bad claims
+    """
+    header_b64, payload_b64, signature_b64 = parts
+    signature = _b64url_decode(signature_b64)
+
+    public_key = _get_google_public_key(header["kid"])
+    try:
+        public_key.verify(
+            signature,
+            f"{header_b64}.{payload_b64}".encode(),
+            padding.PKCS1v15(),
+            hashes.SHA256(),
         )
+    except InvalidSignature:
+        raise ValueError("Token signature verification failed") from None
+
+    if claims.get("aud") != project_id:
+        raise ValueError(f"Token has incorrect audience: expected {project_id}")
+    if claims.get("iss") != _FIREBASE_ISSUER_PREFIX + project_id:
+        raise ValueError(f"Token has incorrect issuer: {claims.get('iss')}")
+
+    subject = claims.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise ValueError("Token has invalid subject")
+
+    now = time.time()
+    issued_at = claims.get("iat")
+    expires_at = claims.get("exp")
+    if not isinstance(issued_at, (int, float)) or not isinstance(expires_at, (int, float)):
+        raise ValueError("Token missing iat or exp claim")
+    if issued_at > now:
+        raise ValueError("Token used too early")
+    if expires_at <= now:
+        raise _ExpiredTokenError("Token expired")
+
+    claims["uid"] = subject
+    return claims
+
+
+def _verify_user_id(
+    token: str, parts: tuple[str, str, str], header: dict, claims: dict, cache_key: bytes
+) -> str:
+    """Verify an uncached Firebase ID token and cache the resulting user_id.
+
+    Blocking (RSA verify, and a key fetch if Google rotated keys), so callers on the
+    event loop run it in the threadpool.
+
+    Args:
+        token: Raw ID token
+        parts: Token split into header, payload, and signature segments
+        header: Decoded JWT header
+        claims: Decoded (not yet trusted) JWT payload
+        cache_key: Verification cache key for the token
+
+    Returns:
+        user_id: User identifier (Firebase UID)
 
-    # Verify Firebase token
-    if not FIREBASE_AVAILABLE or not auth:
+    Raises:
+        HTTPException: If token is invalid or expired
+    """
+    if not _ensure_firebase():
         logger.error("Firebase authentication not available - check server logs for initialization errors")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Firebase authentication not available on server. Check server logs for details.",
-        )
+        raise _http_error(_ERR_FIREBASE_UNAVAILABLE)
+
+    # Project ID resolved (and cached) by the SDK from app options, credentials,
+    # or GOOGLE_CLOUD_PROJECT - it is the expected token audience
+    project_id = firebase_admin.get_app().project_id
+    if not project_id:
+        logger.error("Firebase project ID not configured - set GOOGLE_CLOUD_PROJECT")
+        raise _http_error(_ERR_FIREBASE_UNAVAILABLE)
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        if _is_auth_emulator():
+            # Emulator tokens are unsigned - let the SDK apply its emulator rules
+            decoded_token = auth.verify_id_token(token)
+        else:
+            decoded_token = _verify_firebase_token(parts, header, claims, project_id)
         user_id = decoded_token.get("uid")
         if user_id:
-            return str(user_id)
+            user_id = str(user_id)
+            _cache_user_id(cache_key, user_id, decoded_token.get("exp", 0))
+            return user_id
         else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Firebase token missing user ID",
-            )
+            raise _http_error(_ERR_MISSING_USER_ID)
     except ValueError as e:
+        if isinstance(e, _ExpiredTokenError):
+            _invalidate_cached_token(cache_key)
+            raise _http_error(_ERR_TOKEN_EXPIRED) from None
+
         # ValueError often indicates token format issues (like padding)
         error_msg = str(e)
         if "padding" in error_msg.lower():
-            logger.warning(f"Token padding error - token may be truncated or malformed: {error_msg}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token format: token appears to be truncated or malformed. Please ensure you're using a complete Firebase ID token.",
+            logger.warning(
+                "Token padding error - token may be truncated or malformed: %s", error_msg
             )
+            raise _http_error(_ERR_MALFORMED_TOKEN) from None
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {error_msg}",
-        )
+        ) from None
     except Exception as e:
+        # Expired tokens must never be served from the cache
+        if isinstance(e, auth.ExpiredIdTokenError):
+            _invalidate_cached_token(cache_key)
+
         # Check if it's a Firebase-specific exception
         if firebase_admin and hasattr(firebase_admin.exceptions, 'InvalidArgumentError'):
             if isinstance(e, firebase_admin.exceptions.InvalidArgumentError):
                 error_msg = str(e)
                 if "padding" in error_msg.lower():
-                    logger.warning(f"Token padding error: {error_msg}")
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid token format: token appears to be truncated or malformed. Please ensure you're using a complete Firebase ID token.",
-                    )
+                    logger.warning("Token padding error: %s", error_msg)
+                    raise _http_error(_ERR_MALFORMED_TOKEN) from None
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail=f"Invalid Firebase token: {error_msg}",
-                )
+                ) from None
         
         # Log and re-raise as generic error
-        logger.error(f"Firebase verification error: {e}", exc_info=True)
+        logger.error("Firebase verification error: %s", e, exc_info=True)
         error_msg = str(e)
         if "padding" in error_msg.lower():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token format: token appears to be truncated or malformed. Please ensure you're using a complete Firebase ID token.",
-            )
+            raise _http_error(_ERR_MALFORMED_TOKEN) from None
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Firebase token verification failed: {error_msg}",
-        )
+        ) from None
+
+
+async def authenticate_token(token: str) -> str:
+    """Validate a raw Firebase ID token and return its user_id.
+
+    Args:
+        token: Bearer token from the Authorization header
+
+    Returns:
+        user_id: User identifier (Firebase UID)
+
+    Raises:
+        HTTPException: If token is invalid or expired
+    """
+    # Clean and validate token format
+    if not token:
+        raise _http_error(_ERR_MISSING_TOKEN)
+
+    # Remove any whitespace
+    token = token.strip()
+
+    # Basic validation: Firebase tokens are JWTs with 3 base64url parts separated by dots.
+    # One compiled-regex pass checks shape and alphabet and yields the segments.
+    match = _JWT_PATTERN.fullmatch(token)
+    if match is None:
+        logger.warning("Invalid token format: not a 3-part base64url JWT (length %d)", len(token))
+        raise _http_error(_ERR_INVALID_FORMAT)
+    parts = match.groups()
+
+    # Fast path: token already verified recently
+    cache_key = _token_cache_key(token)
+    cached_user_id = _get_cached_user_id(cache_key)
+    if cached_user_id is not None:
+        return cached_user_id
+
+    # Dispatch on the unverified header so tokens that cannot be Firebase ID tokens
+    # are rejected without paying for signature verification
+    try:
+        header = _decode_jwt_segment(parts[0])
+    except ValueError:
+        logger.warning("Invalid token format: undecodable JWT header")
+        raise _http_error(_ERR_INVALID_FORMAT) from None
+    if not _is_firebase_header(header):
+        logger.warning("Rejected non-Firebase token: alg=%s", header.get("alg"))
+        raise _http_error(_ERR_NOT_FIREBASE_TOKEN)
+
+    # Same for the unverified issuer: tokens from other providers are rejected before
+    # any key lookup, so they can never trigger a Google key fetch
+    try:
+        claims = _decode_jwt_segment(parts[1])
+    except ValueError:
+        logger.warning("Invalid token format: undecodable JWT payload")
+        raise _http_error(_ERR_MALFORMED_TOKEN) from None
+    issuer = claims.get("iss")
+    if not isinstance(issuer, str) or not issuer.startswith(_FIREBASE_ISSUER_PREFIX):
+        logger.warning("Rejected non-Firebase token: iss=%s", issuer)
+        raise _http_error(_ERR_NOT_FIREBASE_TOKEN)
+
+    return await run_in_threadpool(_verify_user_id, token, parts, header, claims, cache_key)
+
+
+def _bearer_token(authorization: str | None) -> str | None:
+    """Return the credentials of a "Bearer <token>" Authorization header, else None.
+
+    Matches HTTPBearer(auto_error=False): other schemes and empty credentials are
+    treated as no token at all.
+    """
+    if not authorization:
+        return None
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        return None
+    return credentials
+
 
+async def _authenticate_bearer(token: str) -> str:
+    """authenticate_token(), with any unexpected failure rejected as a 401.
 
-def get_user_id_required(
-    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    A bad Authorization header must never turn into a 500, least of all from the
+    middleware, which runs ahead of routes that don't use auth.
+    """
+    try:
+        return await authenticate_token(token)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Unexpected error verifying bearer token")
+        raise _http_error(_ERR_VERIFICATION_FAILED) from None
+
+
+class AuthMiddleware:
+    """Verify the bearer token once per request, ahead of routing.
+
+    Pure ASGI (no BaseHTTPMiddleware task/stream wrapping). The outcome lands in
+    the request state: user_id (None without a token) or auth_error when a token
+    was sent but rejected. Nothing is raised here; get_user_id_optional() raises
+    the stored error, so endpoints that don't ask for a user (e.g. /health)
+    behave exactly as before.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            authorization = None
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    authorization = value.decode("latin-1")
+                    break
+
+            state = scope.setdefault("state", {})
+            token = _bearer_token(authorization)
+            if token is None:
+                state["user_id"] = None
+            else:
+                try:
+                    state["user_id"] = await _authenticate_bearer(token)
+                except HTTPException as e:
+                    state["auth_error"] = e
+
+        await self.app(scope, receive, send)
+
+
+# Bearer security scheme for the OpenAPI schema (Swagger "Authorize"). Never raises;
+# tokens are verified by AuthMiddleware / get_user_id_optional, not by this scheme.
+security = HTTPBearer(auto_error=False)
+
+
+async def get_user_id_optional(
+    request: Request,
+    _credentials: Annotated[HTTPAuthorizationCredentials | None, Security(security)] = None,
+) -> Optional[str]:
+    """Extract and validate user_id from Firebase ID token (optional).
+
+    Returns None if no token provided (allows unauthenticated access).
+    Normally just reads what AuthMiddleware stored on request.state; without the
+    middleware the token is verified here and cached on request.state.user_id.
+
+    Args:
+        request: Current request
+        _credentials: Bearer credentials, only declared to document the security scheme
+
+    Returns:
+        user_id: User identifier (Firebase UID), or None if no token provided
+
+    Raises:
+        HTTPException: If token is invalid or expired (only if token is provided)
+    """
+    state = request.state
+    auth_error = getattr(state, "auth_error", None)
+    if auth_error is not None:
+        raise auth_error
+    if hasattr(state, "user_id"):
+        return state.user_id
+
+    token = _bearer_token(request.headers.get("authorization"))
+    user_id = await _authenticate_bearer(token) if token else None
+    state.user_id = user_id
+    return user_id
+
+
+async def get_user_id_required(
+    user_id: Annotated[str | None, Depends(get_user_id_optional)],
 ) -> str:
     """Extract and validate user_id from Firebase token (REQUIRED).
 
     Raises 401 if no token or invalid token.
     Use this for endpoints that require authentication (like list endpoints).
+    Resolved through get_user_id_optional, so FastAPI's per-request dependency
+    cache shares one verification between both dependencies.
 
     Args:
-        credentials: HTTP Bearer token from Authorization header
+        user_id: User ID from get_user_id_optional
 
     Returns:
         user_id: User identifier (Firebase UID)
@@ -158,15 +655,39 @@ def get_user_id_required(
     Raises:
         HTTPException: If no token provided or token is invalid
     """
-    user_id = get_user_id_optional(credentials)
     if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication required",
-        )
+        raise _http_error(_ERR_AUTH_REQUIRED)
     return user_id
 
 
 # Alias for backward compatibility and easier use
 get_user_id = get_user_id_optional
 
+
+def check_owner_access(owner_id: str | None, user_id: str | None, resource: str) -> None:
+    """Enforce user scoping on a resource that may belong to a user.
+
+    Resources without an owner_id are open to anyone (unauthenticated OK);
+    owned resources are only accessible to their owner.
+
+    Args:
+        owner_id: Owner of the resource, if any
+        user_id: User ID from token (optional)
+        resource: Resource name used in error messages (e.g. "strategy")
+
+    Raises:
+        HTTPException: 401 if the resource is owned and no user is authenticated,
+            403 if it belongs to another user
+    """
+    if not owner_id:
+        return
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Authentication required: this {resource} belongs to a user",
+        )
+    if user_id != owner_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied: {resource} belongs to another user",
+        )
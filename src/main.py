@@ -1,14 +1,17 @@
 """FastAPI application with JWT authentication."""
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
-from pathlib import Path
 
-from dotenv import load_dotenv
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import src._env  # noqa: F401  (loads .env before any module reads the environment)
+from src.auth import AuthMiddleware, refresh_google_public_keys_loop
+from src.repositories import get_firestore_client
 from src.routes import strategies, threads
 
 # Configure logging
@@ -18,11 +21,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
 
-env_path = Path(__file__).parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(env_path)
+async def _warm_repositories() -> None:
+    """Initialize Firestore and repositories off the event loop after startup."""
+    try:
+        await asyncio.to_thread(get_firestore_client)
+    except Exception as e:
+        logger.error("❌ Background Firestore initialization failed: %s", e, exc_info=True)
 
 
 @asynccontextmanager
@@ -30,22 +35,38 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
     # Startup
     logger.info("🚀 Starting Vibe Trade API Server...")
-    logger.info(f"📡 Server running on port {os.getenv('PORT', '8080')}")
-    logger.info(f"🔧 GOOGLE_CLOUD_PROJECT: {os.getenv('GOOGLE_CLOUD_PROJECT')}")
-    logger.info(f"🔧 FIRESTORE_DATABASE: {os.getenv('FIRESTORE_DATABASE')}")
-    logger.info(f"🔧 FIRESTORE_EMULATOR_HOST: {os.getenv('FIRESTORE_EMULATOR_HOST', 'Not set (using production)')}")
-    
-    # Log Firestore connection info (lazy - only when accessed)
-    # Don't access repositories here to avoid triggering import during startup
-    # They will be initialized when first used by endpoints
-    
+    logger.info("📡 Server running on port %s", os.getenv("PORT", "8080"))
+    logger.info("🔧 GOOGLE_CLOUD_PROJECT: %s", os.getenv("GOOGLE_CLOUD_PROJECT"))
+    logger.info("🔧 FIRESTORE_DATABASE: %s", os.getenv("FIRESTORE_DATABASE"))
+    logger.info(
+        "🔧 FIRESTORE_EMULATOR_HOST: %s",
+        os.getenv("FIRESTORE_EMULATOR_HOST", "Not set (using production)"),
+    )
+
+    # Initialize Firestore in the background so /health responds immediately;
+    # endpoints that need it before this finishes initialize it on first use
+    repositories_task = asyncio.create_task(_warm_repositories())
+
+    # Size the shared threadpool (token verification, sync dependencies) to the host
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    thread_limiter.total_tokens = min(64, (os.cpu_count() or 1) * 4)
+    logger.info("🧵 Threadpool size: %d", thread_limiter.total_tokens)
+
+    # Keep Google's token signing keys warm so auth never fetches them on the request path
+    keys_refresh_task = asyncio.create_task(refresh_google_public_keys_loop())
+
     logger.info("✅ Ready for requests")
     yield
     # Shutdown
+    keys_refresh_task.cancel()
+    repositories_task.cancel()
     logger.info("👋 Shutting down Vibe Trade API Server...")
 
 
 # Create FastAPI app
+# Keep the default JSONResponse: for routes with a response_model, FastAPI (>=0.130)
+# serializes straight to JSON bytes in pydantic-core, which beats ORJSONResponse.
+# Setting a custom default_response_class would disable that fast path.
 app = FastAPI(
     title="Vibe Trade API",
     description="API server for vibe-trade with JWT authentication",
@@ -53,15 +74,38 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+
+def _cors_options(origins_setting: str) -> dict:
+    """CORSMiddleware origin options for a comma-separated CORS_ORIGINS value."""
+    cors_origins = [origin.strip() for origin in origins_setting.split(",") if origin.strip()]
+    if "*" in cors_origins:
+        explicit_origins = [origin for origin in cors_origins if origin != "*"]
+        if explicit_origins:
+            logger.warning(
+                "⚠️ CORS_ORIGINS mixes '*' with explicit origins %s: allowing any origin "
+                "without credentials, so those origins don't get credentialed requests",
+                explicit_origins,
+            )
+        # Wildcard: Starlette answers with a static "*" (no per-request lookup). Credentials
+        # stay off, otherwise Starlette would echo back *any* origin as credentialed.
+        # Bearer tokens travel in the Authorization header and don't need credentials mode.
+        return {"allow_origins": ["*"], "allow_credentials": False}
+    # Explicit origins: O(1) membership check per request
+    return {"allow_origins": frozenset(cors_origins), "allow_credentials": True}
+
+
 # Configure CORS
 # In production, restrict origins to your UI domain
-cors_origins = os.getenv("CORS_ORIGINS", "*").split(",")
+cors_kwargs = _cors_options(os.getenv("CORS_ORIGINS", "*"))
+
+# Verify bearer tokens once per request; registered first so CORS stays outermost
+# and answers preflights without touching auth.
+app.add_middleware(AuthMiddleware)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=cors_origins,
-    allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    **cors_kwargs,
 )
 
 # Register routers
@@ -0,0 +1,144 @@
+"""Thread domain model.
+
+Threads are not stored on their own: a thread is the view of the latest strategy
+linked to it, so thread models are built from strategies.
+"""
+
+import pydantic_core
+from pydantic import BaseModel
+
+
+class ThreadResponse(BaseModel):
+    """Response model for a thread."""
+
+    thread_id: str
+    strategy_id: str | None
+    strategy_name: str | None
+    strategy_status: str | None
+    created_at: str | None
+    updated_at: str | None
+
+    @classmethod
+    def from_strategy(cls, strategy) -> "ThreadResponse":
+        """Build a thread from its strategy.
+
+        Strategy fields come from an already-validated repository model, so the
+        thread is constructed without validating them again.
+        """
+        return cls.model_construct(
+            thread_id=strategy.thread_id,
+            strategy_id=strategy.id,
+            strategy_name=strategy.name,
+            strategy_status=strategy.status,
+            created_at=strategy.created_at,
+            updated_at=strategy.updated_at,
+        )
+
+
+class ThreadBatch:
+    """Column-oriented (struct-of-arrays) list of threads.
+
+    Thread lists are reduced and sorted column-wise, and only turned into
+    per-thread JSON objects when serialized, instead of allocating a model per thread.
+    """
+
+    __slots__ = (
+        "thread_ids",
+        "strategy_ids",
+        "strategy_names",
+        "strategy_statuses",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self) -> None:
+        self.thread_ids: list[str] = []
+        self.strategy_ids: list[str | None] = []
+        self.strategy_names: list[str | None] = []
+        self.strategy_statuses: list[str | None] = []
+        self.created_at: list[str | None] = []
+        self.updated_at: list[str | None] = []
+
+    def __len__(self) -> int:
+        return len(self.thread_ids)
+
+    @classmethod
+    def latest_per_thread(cls, strategies) -> "ThreadBatch":
+        """Build one thread per thread_id from its most recently updated strategy.
+
+        Strategies without a thread_id are skipped.
+        """
+        batch = cls()
+        index: dict[str, int] = {}
+
+        for strategy in strategies:
+            thread_id = strategy.thread_id
+            if not thread_id:
+                continue
+
+            i = index.get(thread_id)
+            if i is None:
+                index[thread_id] = len(batch.thread_ids)
+                batch.thread_ids.append(thread_id)
+                batch.strategy_ids.append(strategy.id)
+                batch.strategy_names.append(strategy.name)
+                batch.strategy_statuses.append(strategy.status)
+                batch.created_at.append(strategy.created_at)
+                batch.updated_at.append(strategy.updated_at)
+            elif strategy.updated_at > batch.updated_at[i]:
+                # Thread already seen: keep the one with the latest updated_at
+                batch.strategy_ids[i] = strategy.id
+                batch.strategy_names[i] = strategy.name
+                batch.strategy_statuses[i] = strategy.status
+                batch.created_at[i] = strategy.created_at
+                batch.updated_at[i] = strategy.updated_at
+
+        return batch
+
+    @classmethod
+    def from_latest_first(cls, rows, limit: int | None = None) -> "ThreadBatch":
+        """Build threads from (strategy_id, fields) rows already sorted by updated_at desc.
+
+        The first row seen for a thread_id is its latest strategy, so later rows for
+        it are skipped and iteration stops once limit threads are collected.
+        """
+        batch = cls()
+        seen: set[str] = set()
+
+        for strategy_id, fields in rows:
+            thread_id = fields.get("thread_id")
+            if not thread_id or thread_id in seen:
+                continue
+
+            seen.add(thread_id)
+            batch.thread_ids.append(thread_id)
+            batch.strategy_ids.append(strategy_id)
+            batch.strategy_names.append(fields.get("name"))
+            batch.strategy_statuses.append(fields.get("status"))
+            batch.created_at.append(fields.get("created_at"))
+            batch.updated_at.append(fields.get("updated_at"))
+            if limit is not None and len(seen) >= limit:
+                break
+
+        return batch
+
+    def to_json(self, limit: int | None = None) -> bytes:
+        """Serialize as a JSON array of ThreadResponse objects, most recently updated first.
+
+        At most limit threads are included (all when None).
+        """
+        # Bound list.__getitem__ is a C-level key (no Python-level lambda call per element)
+        order = sorted(range(len(self)), key=self.updated_at.__getitem__, reverse=True)[:limit]
+        return pydantic_core.to_json(
+            [
+                {
+                    "thread_id": self.thread_ids[i],
+                    "strategy_id": self.strategy_ids[i],
+                    "strategy_name": self.strategy_names[i],
+                    "strategy_status": self.strategy_statuses[i],
+                    "created_at": self.created_at[i],
+                    "updated_at": self.updated_at[i],
+                }
+                for i in order
+            ]
+        )
@@ -4,13 +4,21 @@ This module imports and initializes repositories from the MCP project.
 Both API and MCP use the same Firestore client and repository implementations.
 """
 
+import asyncio
+import functools
+import itertools
 import logging
 import os
-from pathlib import Path
-from typing import TYPE_CHECKING
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from dotenv import load_dotenv
-from google.cloud.firestore import Client
+from cachetools import TTLCache
+from google.cloud.firestore import Client, Query
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+import src._env  # noqa: F401  (loads .env before reading configuration)
 
 if TYPE_CHECKING:
     from vibe_trade_mcp.db.card_repository import CardRepository
@@ -18,11 +26,6 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-# Load .env file if it exists (for local development)
-env_path = Path(__file__).parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(env_path)
-
 # Lazy imports - only import when needed
 # This allows the module to be imported even if vibe-trade-mcp isn't installed
 _FirestoreClient = None
@@ -32,8 +35,41 @@ _StrategyRepository = None
 # Initialize Firestore client and repositories lazily
 # These will be initialized when first accessed
 _firestore_client: Client | None = None
+_firestore_clients = None  # itertools.cycle over the client pool
+_strategies_collections = None  # itertools.cycle over per-client collection references
 _card_repository = None
 _strategy_repository = None
+_init_lock = threading.Lock()
+
+T = TypeVar("T")
+
+# Pool for blocking Firestore calls made from request handlers (see in_db()), sized
+# independently of the default threadpool so DB waits don't starve other offloaded work
+DB_POOL = ThreadPoolExecutor(max_workers=40, thread_name_prefix="firestore")
+
+# Fan-out pool for batched reads: N document reads overlap on the shared gRPC channel,
+# so a batch costs roughly one round-trip instead of N sequential ones. Kept separate
+# from DB_POOL because batches are issued from DB_POOL workers (no nested-pool deadlock)
+_read_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="firestore-read")
+
+# Recently read documents are served from memory across requests. Writes happen in MCP
+# (another process), so nothing is invalidated here: the TTLs bound staleness.
+# Cards are shared between strategies and rarely edited; strategies are polled by UIs.
+_CARD_CACHE_TTL_SECONDS = 60
+_STRATEGY_CACHE_TTL_SECONDS = 30
+_CACHE_MAXSIZE = 10_000
+
+# Independent Firestore clients (one gRPC channel each) used round-robin, so concurrent
+# requests don't all queue on a single channel. 1 disables pooling.
+_FIRESTORE_CLIENT_POOL_SIZE = max(1, int(os.getenv("FIRESTORE_CLIENT_POOL_SIZE", "4")))
+
+# Schema coupling: the thread listing (get_owner_thread_rows) is the one read that
+# bypasses the MCP repositories, because they offer no ordered or projected query.
+# It depends on MCP's strategy collection name and stored field names, and must be
+# kept in sync with vibe_trade_mcp's strategy storage. Rows stay plain dicts, so no
+# MCP model hydration is duplicated here - everything else goes through MCP.
+_STRATEGIES_COLLECTION = "strategies"
+_THREAD_ROW_FIELDS = ["thread_id", "name", "status", "created_at", "updated_at"]
 
 
 def _import_mcp_modules():
@@ -52,7 +88,7 @@ def _import_mcp_modules():
         _CardRepository = CardRepository
         _StrategyRepository = StrategyRepository
     except ImportError as e:
-        logger.error(f"❌ Failed to import vibe-trade-mcp: {e}", exc_info=True)
+        logger.error("❌ Failed to import vibe-trade-mcp: %s", e, exc_info=True)
         raise ImportError(
             "vibe-trade-mcp package is not installed. "
             "Install it with: uv pip install --index-url <artifact-registry-url> vibe-trade-mcp"
@@ -60,12 +96,20 @@ def _import_mcp_modules():
 
 
 def _initialize_repositories() -> None:
-    """Initialize Firestore client and repositories."""
-    global _firestore_client, _card_repository, _strategy_repository
-    
-    if _firestore_client is not None:
+    """Initialize Firestore client and repositories (thread-safe, runs once)."""
+    if _strategy_repository is not None:
         return  # Already initialized
-    
+
+    with _init_lock:
+        if _strategy_repository is None:
+            _initialize_repositories_locked()
+
+
+def _initialize_repositories_locked() -> None:
+    """Initialize Firestore client and repositories (caller holds _init_lock)."""
+    global _firestore_client, _firestore_clients, _strategies_collections
+    global _card_repository, _strategy_repository
+
     # Import MCP modules first (lazy)
     _import_mcp_modules()
     
@@ -83,32 +127,186 @@ def _initialize_repositories() -> None:
     # Use None for "(default)" database (emulator limitation)
     database = None if database == "(default)" else database
 
-    logger.info(f"Initializing Firestore client: project={project}, database={database}")
+    logger.info("Initializing Firestore client: project=%s, database=%s", project, database)
 
     try:
         _firestore_client = _FirestoreClient.get_client(project=project, database=database)
-        logger.info(f"✅ Firestore client initialized successfully")
-        logger.info(f"   Client project: {_firestore_client.project}")
-        logger.info(f"   Client database: {getattr(_firestore_client, '_database', 'default')}")
+        logger.info("✅ Firestore client initialized successfully")
+        logger.info("   Client project: %s", _firestore_client.project)
+        logger.info("   Client database: %s", getattr(_firestore_client, "_database", "default"))
     except Exception as e:
-        logger.error(f"❌ Failed to initialize Firestore client: {e}", exc_info=True)
+        logger.error("❌ Failed to initialize Firestore client: %s", e, exc_info=True)
         raise
 
-    # Initialize repositories
+    clients = [_firestore_client]
+    try:
+        # Extra clients come from MCP's factory too, so every pool member is configured
+        # exactly like the MCP client (credentials, emulator, settings)
+        for _ in range(_FIRESTORE_CLIENT_POOL_SIZE - 1):
+            client = _FirestoreClient.get_client(project=project, database=database)
+            if any(client is pooled for pooled in clients):
+                # The factory hands out a shared client: no independent channels to pool
+                logger.info("   MCP Firestore client is shared; pooling disabled")
+                break
+            clients.append(client)
+    except Exception as e:
+        logger.warning("⚠️ Firestore client pool limited to %d client(s): %s", len(clients), e)
+    logger.info("   Client pool size: %d", len(clients))
+    _firestore_clients = itertools.cycle(clients)
+    # Built once: hot query paths reuse the references instead of rebuilding them per call
+    _strategies_collections = itertools.cycle(
+        [client.collection(_STRATEGIES_COLLECTION) for client in clients]
+    )
+
+    # Initialize repositories (one MCP repository per pooled client)
     try:
-        _card_repository = _CardRepository(client=_firestore_client)
-        _strategy_repository = _StrategyRepository(client=_firestore_client)
+        _card_repository = _BatchingRepository(
+            [_CardRepository(client=client) for client in clients],
+            cache_ttl=_CARD_CACHE_TTL_SECONDS,
+        )
+        _strategy_repository = _CachingStrategyRepository(
+            [_StrategyRepository(client=client) for client in clients],
+            cache_ttl=_STRATEGY_CACHE_TTL_SECONDS,
+        )
         logger.info("✅ Repositories initialized successfully")
     except Exception as e:
-        logger.error(f"❌ Failed to initialize repositories: {e}", exc_info=True)
+        logger.error("❌ Failed to initialize repositories: %s", e, exc_info=True)
         raise
 
 
+class _BatchingRepository:
+    """MCP repository wrapper adding batched reads; everything else is delegated.
+
+    Wraps one repository per pooled client and spreads calls over them round-robin.
+    """
+
+    def __init__(self, repositories: list, cache_ttl: float | None = None):
+        self._repositories = itertools.cycle(repositories)
+        # Optional id -> model cache for get_by_id()/get_by_ids(); TTLCache isn't thread-safe
+        self._cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=cache_ttl) if cache_ttl else None
+        self._cache_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(next(self._repositories), name)
+
+    def get_by_id(self, doc_id: str):
+        """Fetch one document by ID, from the cache when enabled.
+
+        Args:
+            doc_id: Document ID to fetch
+
+        Returns:
+            Model, or None if the document doesn't exist
+        """
+        if self._cache is None:
+            return self._get_by_id(doc_id)
+
+        with self._cache_lock:
+            doc = self._cache.get(doc_id)
+        if doc is None:
+            doc = self._get_by_id(doc_id)
+            if doc is not None:
+                with self._cache_lock:
+                    self._cache[doc_id] = doc
+        return doc
+
+    def get_by_ids(self, ids: list[str]) -> dict:
+        """Fetch several documents by ID in one batch.
+
+        Duplicate IDs are read once and the reads overlap on the read pool, so
+        the batch costs about one round-trip. With a cache, only IDs not already
+        cached are read.
+
+        Args:
+            ids: Document IDs to fetch (duplicates allowed)
+
+        Returns:
+            Mapping of ID to model for the documents that exist
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        if self._cache is None:
+            return self._fetch(unique_ids)
+
+        docs = {}
+        with self._cache_lock:
+            for doc_id in unique_ids:
+                doc = self._cache.get(doc_id)
+                if doc is not None:
+                    docs[doc_id] = doc
+        missing = [doc_id for doc_id in unique_ids if doc_id not in docs]
+        if missing:
+            fetched = self._fetch(missing)
+            with self._cache_lock:
+                self._cache.update(fetched)
+            docs.update(fetched)
+        return docs
+
+    def _fetch(self, ids: list[str]) -> dict:
+        """Read distinct IDs from Firestore, concurrently when there are several."""
+        if len(ids) <= 1:
+            found = [self._get_by_id(doc_id) for doc_id in ids]
+        else:
+            found = _read_pool.map(self._get_by_id, ids)
+        return {doc_id: doc for doc_id, doc in zip(ids, found, strict=True) if doc is not None}
+
+    def _get_by_id(self, doc_id: str):
+        """Read one document through the next pooled client."""
+        return next(self._repositories).get_by_id(doc_id)
+
+
+class _CachingStrategyRepository(_BatchingRepository):
+    """Strategy repository wrapper that also caches lookups by thread_id."""
+
+    def __init__(self, repositories: list, cache_ttl: float):
+        super().__init__(repositories, cache_ttl=cache_ttl)
+        self._thread_cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=cache_ttl)
+
+    def get_by_thread_id(self, thread_id: str):
+        """Fetch the strategy linked to a thread, from the cache when recently read.
+
+        Args:
+            thread_id: Thread identifier
+
+        Returns:
+            Strategy model, or None if no strategy is linked to the thread
+        """
+        with self._cache_lock:
+            strategy = self._thread_cache.get(thread_id)
+        if strategy is None:
+            strategy = next(self._repositories).get_by_thread_id(thread_id)
+            if strategy is not None:
+                # Also serves later get_by_id() calls (the reverse isn't safe: a thread
+                # can have several strategies, and only the repository knows which wins)
+                with self._cache_lock:
+                    self._thread_cache[thread_id] = strategy
+                    self._cache[strategy.id] = strategy
+        return strategy
+
+
+async def in_db(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking Firestore call on DB_POOL without blocking the event loop.
+
+    Resolve repositories inside fn (e.g. ``lambda: get_strategy_repository().get_by_id(x)``),
+    not in the arguments: the first get_*_repository() call initializes Firestore under a
+    lock, which must not block the event loop.
+
+    Args:
+        fn: Blocking callable (repository method or sync helper)
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_POOL, functools.partial(fn, *args, **kwargs))
+
+
 # Lazy initialization - initialize on first access
 def get_firestore_client() -> Client:
-    """Get Firestore client (lazy initialization)."""
+    """Get a Firestore client from the pool, round-robin (lazy initialization)."""
     _initialize_repositories()
-    return _firestore_client
+    return next(_firestore_clients)
 
 
 def get_card_repository():
@@ -123,6 +321,33 @@ def get_strategy_repository():
     return _strategy_repository
 
 
+def get_owner_thread_rows(owner_id: str) -> Iterator[tuple[str, dict]]:
+    """Stream an owner's strategies as thread rows, most recently updated first.
+
+    Firestore does the ordering and projects each document down to the thread
+    fields, so callers can keep the first row per thread and stop early.
+    Requires the (owner_id ASC, updated_at DESC) index in firestore.indexes.json;
+    without it iteration raises FailedPrecondition. Queries MCP's strategy collection
+    directly (see _STRATEGIES_COLLECTION for the schema coupling).
+
+    Args:
+        owner_id: Owner (Firebase UID) to list strategies for
+
+    Yields:
+        (strategy_id, fields) pairs, fields limited to thread_id, name, status,
+        created_at and updated_at
+    """
+    _initialize_repositories()
+    query = (
+        next(_strategies_collections)
+        .where(filter=FieldFilter("owner_id", "==", owner_id))
+        .order_by("updated_at", direction=Query.DESCENDING)
+        .select(_THREAD_ROW_FIELDS)
+    )
+    for snapshot in query.stream():
+        yield snapshot.id, snapshot.to_dict()
+
+
 # For backward compatibility, provide module-level access (lazy)
 class _LazyRepositories:
     """Lazy accessor for repositories."""
@@ -1,66 +1,172 @@
 """Strategy endpoints with user scoping."""
 
+import functools
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import pydantic_core
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 
-from src.auth import get_user_id, get_user_id_required
-from src.repositories import card_repository, strategy_repository
+from src.auth import check_owner_access, get_user_id, get_user_id_required
+from src.repositories import get_card_repository, get_strategy_repository, in_db
 
 logger = logging.getLogger(__name__)
 
+# Optional msgpack encoding of the strategy list for service-to-service callers
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+_MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _wants_msgpack(accept: str) -> bool:
+    """Whether an Accept header prefers msgpack over JSON.
+
+    msgpack must be listed explicitly with q > 0, and weighted at least as high
+    as the best range matching JSON (application/json, application/*, */*).
+    """
+    msgpack_q = 0.0
+    json_q = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        if media_type == _MSGPACK_MEDIA_TYPE:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, quality)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
 router = APIRouter(prefix="/api/strategies", tags=["strategies"])
 
+# Strategy fields exposed by the API
+_STRATEGY_FIELDS = frozenset(
+    {
+        "id",
+        "owner_id",
+        "thread_id",
+        "name",
+        "status",
+        "universe",
+        "attachments",
+        "version",
+        "created_at",
+        "updated_at",
+    }
+)
+
 
 class StrategyWithCardsResponse(BaseModel):
-    """Response model for strategy with attached cards."""
+    """Response model for strategy with attached cards (documents the endpoints' schema)."""
 
     strategy: dict
     cards: list[dict]
     card_count: int
 
 
-def _build_strategy_dict(strategy) -> dict:
-    """Build strategy dictionary from Strategy model."""
-    return {
-        "id": strategy.id,
-        "owner_id": strategy.owner_id,
-        "thread_id": strategy.thread_id,
-        "name": strategy.name,
-        "status": strategy.status,
-        "universe": strategy.universe,
-        "attachments": [att.model_dump() for att in strategy.attachments],
-        "version": strategy.version,
-        "created_at": strategy.created_at,
-        "updated_at": strategy.updated_at,
-    }
+def _json_response(content, include: dict | None = None) -> Response:
+    """Serialize trusted repository data straight to JSON (no response-model validation).
+
+    Keys are field names, as with model_dump() (to_json() defaults to aliases).
+    """
+    return Response(
+        content=pydantic_core.to_json(content, include=include, by_alias=False),
+        media_type="application/json",
+    )
+
+
+@functools.cache
+def _strategy_field_filter(model_cls: type) -> set[str] | None:
+    """Fields to include when dumping a strategy model, or None if no filter is needed.
+
+    Strategies are dumped as models through their compiled pydantic-core serializer
+    (no per-strategy dict built in Python). When the repository model has exactly
+    the exposed fields, no include filter has to be applied per item either.
+    """
+    exact = (
+        set(model_cls.model_fields) == _STRATEGY_FIELDS
+        and not model_cls.model_computed_fields
+        and model_cls.model_config.get("extra") != "allow"
+    )
+    return None if exact else set(_STRATEGY_FIELDS)
+
+
+def _strategy_with_cards_response(strategy, cards: list[dict]) -> Response:
+    """Serialize a strategy with its cards (StrategyWithCardsResponse shape)."""
+    fields = _strategy_field_filter(type(strategy))
+    include = None if fields is None else {"strategy": fields, "cards": True, "card_count": True}
+    return _json_response(
+        {"strategy": strategy, "cards": cards, "card_count": len(cards)}, include=include
+    )
+
+
+@functools.cache
+def _fields_dump_as_is(model_cls: type) -> bool:
+    """Whether a model's __dict__ serializes like model_dump() once passed to to_json().
+
+    True unless the model has computed, excluded or extra fields, or custom serializers.
+    Nested models stay models in __dict__ and are encoded by their own serializers.
+    """
+    decorators = model_cls.__pydantic_decorators__
+    return not (
+        model_cls.model_computed_fields
+        or any(field.exclude for field in model_cls.model_fields.values())
+        or model_cls.model_config.get("extra") == "allow"
+        or decorators.field_serializers
+        or decorators.model_serializers
+    )
 
 
 def _get_strategy_cards(strategy) -> list[dict]:
     """Get all cards attached to a strategy with attachment metadata."""
+    card_ids = [attachment.card_id for attachment in strategy.attachments]
+    cards_by_id = get_card_repository().get_by_ids(card_ids)
+
     cards = []
     for attachment in strategy.attachments:
-        card = card_repository.get_by_id(attachment.card_id)
+        card = cards_by_id.get(attachment.card_id)
         if card:
-            card_dict = card.model_dump()
-            card_dict["role"] = attachment.role
-            card_dict["enabled"] = attachment.enabled
-            card_dict["overrides"] = attachment.overrides
-            cards.append(card_dict)
+            fields = card.__dict__ if _fields_dump_as_is(type(card)) else card.model_dump()
+            # One merge builds a new dict (the card's own __dict__ is never mutated)
+            cards.append(
+                fields
+                | {
+                    "role": attachment.role,
+                    "enabled": attachment.enabled,
+                    "overrides": attachment.overrides,
+                }
+            )
     return cards
 
 
-@router.get("", response_model=list[dict])
+@router.get(
+    "",
+    response_model=list[dict],
+    responses={200: {"content": {_MSGPACK_MEDIA_TYPE: {}}}},
+)
 async def get_strategies(
+    request: Request,
     user_id: Annotated[str, Depends(get_user_id_required)],  # REQUIRED auth for listing
-) -> list[dict]:
+) -> Response:
     """Get all strategies for the authenticated user.
 
     **Requires authentication** - prevents unauthenticated users from seeing all strategies.
 
+    Responds with msgpack instead of JSON when the client sends
+    ``Accept: application/msgpack`` (and the optional ormsgpack is installed).
+
     Args:
+        request: Current request (for content negotiation)
         user_id: User ID from Firebase token (required)
 
     Returns:
@@ -70,10 +176,29 @@ async def get_strategies(
         HTTPException: If user is not authenticated
     """
     try:
-        user_strategies = strategy_repository.get_by_owner_id(user_id)
-        return [_build_strategy_dict(s) for s in user_strategies]
+        user_strategies = await in_db(lambda: get_strategy_repository().get_by_owner_id(user_id))
+        include = None
+        if user_strategies:
+            fields = _strategy_field_filter(type(user_strategies[0]))
+            include = None if fields is None else {"__all__": fields}
+
+        if ormsgpack is not None and _wants_msgpack(request.headers.get("accept", "")):
+            # Same JSON-compatible values as the JSON body, in one pydantic-core pass
+            payload = pydantic_core.to_jsonable_python(
+                user_strategies, include=include, by_alias=False
+            )
+            return Response(
+                content=ormsgpack.packb(payload),
+                media_type=_MSGPACK_MEDIA_TYPE,
+                headers={"Vary": "Accept"},
+            )
+
+        # Dump the models straight to JSON bytes instead of building a dict per strategy
+        response = _json_response(user_strategies, include=include)
+        response.headers["Vary"] = "Accept"
+        return response
     except Exception as e:
-        logger.error(f"Error querying strategies for user {user_id}: {e}", exc_info=True)
+        logger.error("Error querying strategies for user %s: %s", user_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
@@ -84,7 +209,7 @@ async def get_strategies(
 async def get_strategy_by_thread_id(
     thread_id: str,
     user_id: Annotated[str | None, Depends(get_user_id)] = None,  # Optional auth
-) -> StrategyWithCardsResponse:
+) -> Response:
     """Get a strategy by thread_id with all its attached cards.
 
     **Authentication is optional:**
@@ -102,7 +227,7 @@ async def get_strategy_by_thread_id(
         HTTPException: If strategy not found or access denied
     """
     try:
-        strategy = strategy_repository.get_by_thread_id(thread_id)
+        strategy = await in_db(lambda: get_strategy_repository().get_by_thread_id(thread_id))
 
         if not strategy:
             raise HTTPException(
@@ -110,34 +235,17 @@ async def get_strategy_by_thread_id(
                 detail=f"No strategy found for thread_id: {thread_id}",
             )
 
-        # Access control:
-        # - If strategy has no owner_id: anyone can access (unauthenticated OK)
-        # - If strategy has owner_id: only the owner can access
-        if strategy.owner_id:
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Authentication required: this strategy belongs to a user",
-                )
-            if user_id != strategy.owner_id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied: strategy belongs to another user",
-                )
-
-        # Strategy has no owner_id OR user is the owner - allow access
-        cards = _get_strategy_cards(strategy)
-
-        return StrategyWithCardsResponse(
-            strategy=_build_strategy_dict(strategy),
-            cards=cards,
-            card_count=len(cards),
-        )
+        # Unowned strategies are public; owned ones only for their owner (401/403 otherwise)
+        check_owner_access(strategy.owner_id, user_id, "strategy")
+
+        cards = await in_db(_get_strategy_cards, strategy)
+
+        return _strategy_with_cards_response(strategy, cards)
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error querying strategy by thread_id {thread_id}: {e}", exc_info=True)
+        logger.error("Error querying strategy by thread_id %s: %s", thread_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
@@ -148,7 +256,7 @@ async def get_strategy_by_thread_id(
 async def get_strategy_by_id(
     strategy_id: str,
     user_id: Annotated[str | None, Depends(get_user_id)] = None,  # Optional auth
-) -> StrategyWithCardsResponse:
+) -> Response:
     """Get a strategy by ID with all its attached cards.
 
     **Authentication is optional:**
@@ -165,33 +273,16 @@ async def get_strategy_by_id(
     Raises:
         HTTPException: If strategy not found or access denied
     """
-    strategy = strategy_repository.get_by_id(strategy_id)
+    strategy = await in_db(lambda: get_strategy_repository().get_by_id(strategy_id))
     if strategy is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Strategy not found: {strategy_id}",
         )
 
-    # Access control:
-    # - If strategy has no owner_id: anyone can access (unauthenticated OK)
-    # - If strategy has owner_id: only the owner can access
-    if strategy.owner_id:
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required: this strategy belongs to a user",
-            )
-        if user_id != strategy.owner_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied: strategy belongs to another user",
-            )
+    # Unowned strategies are public; owned ones only for their owner (401/403 otherwise)
+    check_owner_access(strategy.owner_id, user_id, "strategy")
 
-    # Strategy has no owner_id OR user is the owner - allow access
-    cards = _get_strategy_cards(strategy)
+    cards = await in_db(_get_strategy_cards, strategy)
 
-    return StrategyWithCardsResponse(
-        strategy=_build_strategy_dict(strategy),
-        cards=cards,
-        card_count=len(cards),
-    )
+    return _strategy_with_cards_response(strategy, cards)
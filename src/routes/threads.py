@@ -1,34 +1,54 @@
 """Thread endpoints with user scoping."""
 
 import logging
+import time
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from google.api_core.exceptions import FailedPrecondition
 
-from src.auth import get_user_id, get_user_id_required
-from src.repositories import strategy_repository
+from src.auth import check_owner_access, get_user_id, get_user_id_required
+from src.models.thread import ThreadBatch, ThreadResponse
+from src.repositories import get_owner_thread_rows, get_strategy_repository, in_db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/threads", tags=["threads"])
 
+# Once the ordered query fails for lack of its composite index, requests go straight
+# to the full scan until this long has passed, so a later index deploy is picked up
+_ORDERED_QUERY_RETRY_SECONDS = 10 * 60
+_ordered_query_retry_at = 0.0
+_ordered_query_fallback_logged = False
+
+
+def _load_threads(user_id: str, limit: int | None) -> ThreadBatch:
+    """Load the latest strategy per thread for a user (blocking Firestore I/O)."""
+    global _ordered_query_retry_at, _ordered_query_fallback_logged
+
+    if time.monotonic() >= _ordered_query_retry_at:
+        try:
+            # Firestore returns the user's strategies newest first: first row per thread wins
+            return ThreadBatch.from_latest_first(get_owner_thread_rows(user_id), limit)
+        except FailedPrecondition as e:
+            # Composite index not deployed (see firestore.indexes.json): reduce client-side
+            _ordered_query_retry_at = time.monotonic() + _ORDERED_QUERY_RETRY_SECONDS
+            if not _ordered_query_fallback_logged:
+                _ordered_query_fallback_logged = True
+                logger.warning(
+                    "Ordered thread query unavailable, falling back to full scan: %s", e
+                )
+            else:
+                logger.debug("Ordered thread query still unavailable: %s", e)
 
-class ThreadResponse(BaseModel):
-    """Response model for a thread."""
-
-    thread_id: str
-    strategy_id: str | None
-    strategy_name: str | None
-    strategy_status: str | None
-    created_at: str | None
-    updated_at: str | None
+    return ThreadBatch.latest_per_thread(get_strategy_repository().get_by_owner_id(user_id))
 
 
 @router.get("", response_model=list[ThreadResponse])
 async def get_threads(
     user_id: Annotated[str, Depends(get_user_id_required)],  # REQUIRED auth for listing
-) -> list[ThreadResponse]:
+    limit: Annotated[int | None, Query(ge=1)] = None,
+) -> Response:
     """Get all threads for the authenticated user.
 
     **Requires authentication** - prevents unauthenticated users from seeing all threads.
@@ -37,6 +57,7 @@ async def get_threads(
 
     Args:
         user_id: User ID from Firebase token (required)
+        limit: Maximum number of threads to return, most recently updated first
 
     Returns:
         List of threads with associated strategy information
@@ -45,50 +66,17 @@ async def get_threads(
         HTTPException: If user is not authenticated
     """
     try:
-        # Get all strategies for this user
-        strategies = strategy_repository.get_by_owner_id(user_id)
-
-        # Build a map of thread_id -> strategy info
-        thread_map: dict[str, dict] = {}
-
-        for strategy in strategies:
-            if not strategy.thread_id:
-                continue
-
-            thread_id = strategy.thread_id
-
-            # If thread already exists, keep the one with the latest updated_at
-            if thread_id in thread_map:
-                existing_updated = thread_map[thread_id].get("updated_at", "")
-                if strategy.updated_at > existing_updated:
-                    thread_map[thread_id] = {
-                        "thread_id": thread_id,
-                        "strategy_id": strategy.id,
-                        "strategy_name": strategy.name,
-                        "strategy_status": strategy.status,
-                        "created_at": strategy.created_at,
-                        "updated_at": strategy.updated_at,
-                    }
-            else:
-                thread_map[thread_id] = {
-                    "thread_id": thread_id,
-                    "strategy_id": strategy.id,
-                    "strategy_name": strategy.name,
-                    "strategy_status": strategy.status,
-                    "created_at": strategy.created_at,
-                    "updated_at": strategy.updated_at,
-                }
+        # Keep the latest strategy per thread, column-wise until serialization
+        threads = await in_db(_load_threads, user_id, limit)
 
-        # Convert to list and sort by updated_at (most recent first)
-        threads = list(thread_map.values())
-        threads.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
+        logger.info("Found %d threads for user %s", len(threads), user_id)
 
-        logger.info(f"Found {len(threads)} threads for user {user_id}")
-
-        return [ThreadResponse(**thread) for thread in threads]
+        # Trusted repository data: serialize directly (sorted by updated_at, most
+        # recent first) instead of validating a response model per thread
+        return Response(content=threads.to_json(limit), media_type="application/json")
 
     except Exception as e:
-        logger.error(f"Error querying threads for user {user_id}: {e}", exc_info=True)
+        logger.error("Error querying threads for user %s: %s", user_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
@@ -118,7 +106,7 @@ async def get_thread(
     """
     try:
         # Get strategy by thread_id
-        strategy = strategy_repository.get_by_thread_id(thread_id)
+        strategy = await in_db(lambda: get_strategy_repository().get_by_thread_id(thread_id))
 
         if not strategy:
             raise HTTPException(
@@ -126,35 +114,15 @@ async def get_thread(
                 detail=f"Thread not found: {thread_id}",
             )
 
-        # Access control:
-        # - If strategy has no owner_id: anyone can access (unauthenticated OK)
-        # - If strategy has owner_id: only the owner can access
-        if strategy.owner_id:
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Authentication required: this thread belongs to a user",
-                )
-            if user_id != strategy.owner_id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied: thread belongs to another user",
-                )
+        # Threads of unowned strategies are public; owned ones only for their owner
+        check_owner_access(strategy.owner_id, user_id, "thread")
 
-        # Strategy has no owner_id OR user is the owner - allow access
-        return ThreadResponse(
-            thread_id=thread_id,
-            strategy_id=strategy.id,
-            strategy_name=strategy.name,
-            strategy_status=strategy.status,
-            created_at=strategy.created_at,
-            updated_at=strategy.updated_at,
-        )
+        return ThreadResponse.from_strategy(strategy)
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error querying thread {thread_id}: {e}", exc_info=True)
+        logger.error("Error querying thread %s: %s", thread_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
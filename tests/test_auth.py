@@ -0,0 +1,346 @@
+"""Tests for offline Firebase ID token verification in src.auth."""
+
+import asyncio
+import base64
+import datetime
+import json
+import time
+
+import firebase_admin
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import src.auth as auth_module
+
+PROJECT_ID = "test-project"
+KID = "test-kid"
+USER_ID = "user-123"
+
+
+def _make_key_and_cert():
+    """Generate an RSA signing key and a self-signed certificate for it."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert
+
+
+SIGNING_KEY, SIGNING_CERT = _make_key_and_cert()
+OTHER_KEY, _ = _make_key_and_cert()
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _segment(obj) -> str:
+    return _b64url(json.dumps(obj).encode())
+
+
+def _claims(**overrides) -> dict:
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": USER_ID,
+        "iat": now - 60,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return claims
+
+
+def _make_token(claims=None, header=None, key=SIGNING_KEY) -> str:
+    """Build an RS256-signed JWT (signed with key, SIGNING_KEY by default)."""
+    header = header or {"alg": "RS256", "kid": KID, "typ": "JWT"}
+    signing_input = f"{_segment(header)}.{_segment(claims or _claims())}"
+    signature = key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    return f"{signing_input}.{_b64url(signature)}"
+
+
+def _authenticate(token: str) -> str:
+    return asyncio.run(auth_module.authenticate_token(token))
+
+
+def _rejection(token: str) -> HTTPException:
+    with pytest.raises(HTTPException) as exc_info:
+        _authenticate(token)
+    return exc_info.value
+
+
+@pytest.fixture(scope="module", autouse=True)
+def firebase_app():
+    """Real Firebase app, only used for its project ID (no network access)."""
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(options={"projectId": PROJECT_ID})
+    assert auth_module._ensure_firebase()
+
+
+@pytest.fixture(autouse=True)
+def google_keys(monkeypatch):
+    """Serve the test certificate as Google's keys; returns the list of fetch times."""
+    fetches = []
+
+    def fetch_google_public_keys():
+        fetches.append(time.time())
+        return {KID: SIGNING_CERT.public_key()}, time.time() + 3600
+
+    monkeypatch.delenv("FIREBASE_AUTH_EMULATOR_HOST", raising=False)
+    monkeypatch.setattr(auth_module, "_fetch_google_public_keys", fetch_google_public_keys)
+    monkeypatch.setattr(auth_module, "_google_public_keys", {})
+    monkeypatch.setattr(auth_module, "_google_public_keys_expire_at", 0.0)
+    monkeypatch.setattr(auth_module, "_google_public_keys_attempted_at", 0.0)
+    auth_module._TOKEN_CACHE.clear()
+    yield fetches
+    auth_module._TOKEN_CACHE.clear()
+
+
+def test_valid_token_returns_uid():
+    assert _authenticate(_make_token()) == USER_ID
+
+
+def test_wrong_audience_rejected():
+    error = _rejection(_make_token(_claims(aud="other-project")))
+    assert error.status_code == 401
+    assert "incorrect audience" in error.detail
+
+
+def test_wrong_project_issuer_rejected():
+    error = _rejection(_make_token(_claims(iss="https://securetoken.google.com/other-project")))
+    assert error.status_code == 401
+    assert "incorrect issuer" in error.detail
+
+
+def test_non_firebase_issuer_rejected_without_key_fetch(google_keys):
+    error = _rejection(_make_token(_claims(iss="https://accounts.google.com")))
+    assert error.status_code == 401
+    assert error.detail == "Invalid token: not a Firebase ID token"
+    assert google_keys == []
+
+
+def test_expired_token_rejected():
+    now = int(time.time())
+    error = _rejection(_make_token(_claims(iat=now - 7200, exp=now - 3600)))
+    assert error.status_code == 401
+    assert error.detail == "Invalid token: Token expired"
+
+
+def test_future_issued_at_rejected():
+    error = _rejection(_make_token(_claims(iat=int(time.time()) + 600)))
+    assert error.status_code == 401
+    assert "too early" in error.detail
+
+
+def test_bad_signature_rejected():
+    error = _rejection(_make_token(key=OTHER_KEY))
+    assert error.status_code == 401
+    assert "signature verification failed" in error.detail
+
+
+def test_tampered_payload_rejected():
+    header, _, signature = _make_token().split(".")
+    forged = f"{header}.{_segment(_claims(sub='someone-else'))}.{signature}"
+    error = _rejection(forged)
+    assert error.status_code == 401
+    assert "signature verification failed" in error.detail
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        {"alg": "none", "kid": KID},
+        {"alg": "HS256", "kid": KID},
+        {"alg": "RS256"},
+        {"alg": "RS256", "kid": ""},
+        {"alg": "RS256", "kid": ["x"]},
+        {"alg": "RS256", "kid": {"a": 1}},
+        {"alg": "RS256", "kid": 7},
+    ],
+)
+def test_non_rs256_or_kidless_header_rejected_without_key_fetch(header, google_keys):
+    signing_input = f"{_segment(header)}.{_segment(_claims())}"
+    error = _rejection(f"{signing_input}.")
+    assert error.status_code == 401
+    assert error.detail == "Invalid token: not a Firebase ID token"
+    assert google_keys == []
+
+
+def test_unknown_kid_refreshes_keys_at_most_once_per_interval(google_keys):
+    assert _authenticate(_make_token()) == USER_ID
+    assert len(google_keys) == 1
+
+    header = {"alg": "RS256", "kid": "rotated-kid"}
+    for _ in range(3):
+        error = _rejection(_make_token(header=header))
+        assert error.status_code == 401
+        assert "unknown key ID" in error.detail
+    # Keys were fetched just now, so unknown kids don't trigger more fetches
+    assert len(google_keys) == 1
+
+
+def test_unknown_kid_refreshes_keys_after_interval(monkeypatch, google_keys):
+    assert _authenticate(_make_token()) == USER_ID
+    monkeypatch.setattr(
+        auth_module,
+        "_google_public_keys_attempted_at",
+        time.time() - auth_module._CERTS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
+
+    _rejection(_make_token(header={"alg": "RS256", "kid": "rotated-kid"}))
+    assert len(google_keys) == 2
+
+
+def _fail_key_fetches(monkeypatch) -> list[float]:
+    attempts = []
+
+    def fetch_google_public_keys():
+        attempts.append(time.time())
+        raise OSError("certificate endpoint unavailable")
+
+    monkeypatch.setattr(auth_module, "_fetch_google_public_keys", fetch_google_public_keys)
+    return attempts
+
+
+def test_key_fetch_outage_keeps_previous_keys_and_throttles_retries(monkeypatch):
+    assert _authenticate(_make_token()) == USER_ID
+    # Max-age lapses while Google's certificate endpoint is down
+    monkeypatch.setattr(auth_module, "_google_public_keys_expire_at", time.time() - 1)
+    monkeypatch.setattr(
+        auth_module,
+        "_google_public_keys_attempted_at",
+        time.time() - auth_module._CERTS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
+    attempts = _fail_key_fetches(monkeypatch)
+
+    for i in range(5):
+        # Distinct subjects so every request misses the token cache
+        assert _authenticate(_make_token(_claims(sub=f"user-{i}"))) == f"user-{i}"
+    assert len(attempts) == 1
+
+
+def test_initial_key_fetch_failure_is_throttled(monkeypatch):
+    attempts = _fail_key_fetches(monkeypatch)
+
+    for _ in range(3):
+        error = _rejection(_make_token())
+        assert error.status_code == 401
+        assert "unknown key ID" in error.detail
+    assert len(attempts) == 1
+
+
+@pytest.mark.parametrize("subject", ["", "x" * 129, 42])
+def test_invalid_subject_rejected(subject):
+    error = _rejection(_make_token(_claims(sub=subject)))
+    assert error.status_code == 401
+    assert "invalid subject" in error.detail
+
+
+def test_max_length_subject_accepted():
+    assert _authenticate(_make_token(_claims(sub="x" * 128))) == "x" * 128
+
+
+def test_cache_hit_skips_verification(monkeypatch):
+    token = _make_token()
+    assert _authenticate(token) == USER_ID
+
+    def fail_verification(*args, **kwargs):
+        raise AssertionError("cached token was verified again")
+
+    monkeypatch.setattr(auth_module, "_verify_firebase_token", fail_verification)
+    assert _authenticate(token) == USER_ID
+
+
+def test_deeply_nested_segment_rejected():
+    nested = _b64url(b"[" * 3000)
+    error = _rejection(f"{nested}.{_segment(_claims())}.sig")
+    assert error.status_code == 401
+    assert error.detail == "Invalid token format: token must be a valid JWT"
+
+    header = _segment({"alg": "RS256", "kid": KID})
+    error = _rejection(f"{header}.{nested}.sig")
+    assert error.status_code == 401
+    assert error.detail.startswith("Invalid token format: token appears to be truncated")
+
+
+def test_non_jwt_rejected():
+    error = _rejection("not-a-jwt")
+    assert error.status_code == 401
+    assert error.detail == "Invalid token format: token must be a valid JWT"
+
+
+def test_rejections_are_fresh_exceptions_without_context():
+    first = _rejection(_make_token(_claims(iss="https://accounts.google.com")))
+    second = _rejection(_make_token(_claims(iss="https://accounts.google.com")))
+    assert first is not second
+
+    header = _segment({"alg": "RS256", "kid": KID})
+    error = _rejection(f"{header}.{_b64url(b'not json')}.sig")
+    assert error.__cause__ is None
+    assert error.__suppress_context__
+
+
+def _middleware_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(auth_module.AuthMiddleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/me")
+    async def me(user_id: str = Depends(auth_module.get_user_id_required)):
+        return {"user_id": user_id}
+
+    return TestClient(app)
+
+
+def test_middleware_authenticates_bearer_token():
+    response = _middleware_client().get("/me", headers={"Authorization": f"Bearer {_make_token()}"})
+    assert response.status_code == 200
+    assert response.json() == {"user_id": USER_ID}
+
+
+def test_middleware_unexpected_error_only_fails_authenticated_routes(monkeypatch):
+    async def broken_authenticate_token(token):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(auth_module, "authenticate_token", broken_authenticate_token)
+    client = _middleware_client()
+    headers = {"Authorization": f"Bearer {_make_token()}"}
+
+    assert client.get("/health", headers=headers).status_code == 200
+    response = client.get("/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Firebase token verification failed"}
+
+
+def test_stdlib_base64_fallback_verifies_tokens(monkeypatch):
+    # pybase64 is an optional extra: decoding must work the same without it
+    monkeypatch.setattr(auth_module, "_base64", base64)
+    assert _authenticate(_make_token()) == USER_ID
+
+
+def test_openapi_documents_bearer_security_scheme():
+    schema = _middleware_client().get("/openapi.json").json()
+
+    assert schema["components"]["securitySchemes"]["HTTPBearer"] == {
+        "type": "http",
+        "scheme": "bearer",
+    }
+    assert schema["paths"]["/me"]["get"]["security"] == [{"HTTPBearer": []}]
+    assert "security" not in schema["paths"]["/health"]["get"]
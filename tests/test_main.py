@@ -0,0 +1,78 @@
+"""Tests for the CORS configuration in src.main."""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from src import main
+
+APP_ORIGIN = "https://app.example"
+
+
+def _client(origins_setting: str) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        **main._cors_options(origins_setting),
+    )
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return TestClient(app)
+
+
+def test_explicit_origins_allow_credentials():
+    options = main._cors_options(f" {APP_ORIGIN} , https://admin.example,")
+
+    assert options == {
+        "allow_origins": frozenset({APP_ORIGIN, "https://admin.example"}),
+        "allow_credentials": True,
+    }
+
+
+def test_explicit_origin_gets_credentialed_response():
+    response = _client(APP_ORIGIN).get("/ping", headers={"Origin": APP_ORIGIN})
+
+    assert response.headers["access-control-allow-origin"] == APP_ORIGIN
+    assert response.headers["access-control-allow-credentials"] == "true"
+
+
+def test_unlisted_origin_is_not_allowed():
+    response = _client(APP_ORIGIN).get("/ping", headers={"Origin": "https://evil.example"})
+
+    assert "access-control-allow-origin" not in response.headers
+
+
+@pytest.mark.parametrize("origins_setting", ["*", f"{APP_ORIGIN},*"])
+def test_wildcard_never_allows_credentials(origins_setting):
+    assert main._cors_options(origins_setting) == {
+        "allow_origins": ["*"],
+        "allow_credentials": False,
+    }
+
+    response = _client(origins_setting).get("/ping", headers={"Origin": "https://evil.example"})
+
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "access-control-allow-credentials" not in response.headers
+
+
+def test_wildcard_mixed_with_explicit_origins_warns(caplog):
+    with caplog.at_level(logging.WARNING, logger=main.logger.name):
+        main._cors_options(f"{APP_ORIGIN},*")
+
+    assert len(caplog.records) == 1
+    assert APP_ORIGIN in caplog.records[0].getMessage()
+
+
+def test_plain_wildcard_does_not_warn(caplog):
+    with caplog.at_level(logging.WARNING, logger=main.logger.name):
+        main._cors_options("*")
+
+    assert caplog.records == []
@@ -0,0 +1,236 @@
+"""Tests for the batching and caching repository wrappers in src.repositories."""
+
+import functools
+import threading
+from types import SimpleNamespace
+
+import pytest
+from cachetools import TTLCache
+
+from src import repositories
+
+TTL = 60.0
+
+
+class _FakeMcpRepository:
+    """Stands in for an MCP repository bound to one pooled client."""
+
+    def __init__(self, docs: dict, thread_index: dict | None = None):
+        self.docs = docs
+        self.thread_index = thread_index or {}
+        self.reads = []
+        self.thread_reads = []
+        self._lock = threading.Lock()
+
+    def get_by_id(self, doc_id):
+        with self._lock:
+            self.reads.append(doc_id)
+        return self.docs.get(doc_id)
+
+    def get_by_thread_id(self, thread_id):
+        self.thread_reads.append(thread_id)
+        strategy_id = self.thread_index.get(thread_id)
+        return self.docs.get(strategy_id) if strategy_id else None
+
+    def create(self, doc):
+        return ("created", doc)
+
+
+def _doc(doc_id: str) -> SimpleNamespace:
+    return SimpleNamespace(id=doc_id)
+
+
+DOCS = {doc_id: _doc(doc_id) for doc_id in ("a", "b", "c")}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual clock driving every TTLCache the wrappers create."""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(
+        repositories, "TTLCache", functools.partial(TTLCache, timer=lambda: clock.now)
+    )
+    return clock
+
+
+def _reads(*fakes) -> list[str]:
+    return sorted(doc_id for fake in fakes for doc_id in fake.reads)
+
+
+def test_get_by_ids_reads_each_distinct_id_once():
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._BatchingRepository([fake])
+
+    docs = repository.get_by_ids(["a", "b", "a", "missing", "b"])
+
+    assert docs == {"a": DOCS["a"], "b": DOCS["b"]}
+    assert _reads(fake) == ["a", "b", "missing"]
+
+
+def test_reads_are_spread_over_pooled_repositories():
+    fakes = [_FakeMcpRepository(DOCS), _FakeMcpRepository(DOCS)]
+    repository = repositories._BatchingRepository(fakes)
+
+    repository.get_by_id("a")
+    repository.get_by_id("b")
+
+    assert fakes[0].reads == ["a"]
+    assert fakes[1].reads == ["b"]
+
+
+def test_without_cache_every_call_reads():
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._BatchingRepository([fake])
+
+    repository.get_by_id("a")
+    repository.get_by_ids(["a", "b"])
+
+    assert _reads(fake) == ["a", "a", "b"]
+
+
+def test_other_methods_are_delegated():
+    repository = repositories._BatchingRepository([_FakeMcpRepository(DOCS)])
+    assert repository.create("doc") == ("created", "doc")
+
+
+def test_cached_get_by_ids_reads_only_uncached_ids(clock):
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._BatchingRepository([fake], cache_ttl=TTL)
+
+    repository.get_by_id("a")
+    docs = repository.get_by_ids(["a", "b", "c"])
+
+    assert docs == DOCS
+    assert _reads(fake) == ["a", "b", "c"]
+
+
+def test_misses_are_not_cached(clock):
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._BatchingRepository([fake], cache_ttl=TTL)
+
+    assert repository.get_by_id("missing") is None
+    assert repository.get_by_ids(["missing"]) == {}
+    assert repository.get_by_id("missing") is None
+
+    assert fake.reads == ["missing", "missing", "missing"]
+
+
+def test_cache_entries_expire_after_ttl(clock):
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._BatchingRepository([fake], cache_ttl=TTL)
+
+    repository.get_by_ids(["a", "b"])
+    clock.now = TTL - 1
+    repository.get_by_id("a")
+    assert _reads(fake) == ["a", "b"]
+
+    clock.now = TTL
+    repository.get_by_ids(["a", "b"])
+    assert _reads(fake) == ["a", "a", "b", "b"]
+
+
+def test_thread_lookup_fills_id_cache(clock):
+    fake = _FakeMcpRepository(DOCS, thread_index={"t1": "a"})
+    repository = repositories._CachingStrategyRepository([fake], cache_ttl=TTL)
+
+    assert repository.get_by_thread_id("t1") is DOCS["a"]
+    assert repository.get_by_thread_id("t1") is DOCS["a"]
+    assert repository.get_by_id("a") is DOCS["a"]
+
+    assert fake.thread_reads == ["t1"]
+    assert fake.reads == []
+
+
+def test_id_lookup_does_not_fill_thread_cache(clock):
+    fake = _FakeMcpRepository(DOCS, thread_index={"t1": "a"})
+    repository = repositories._CachingStrategyRepository([fake], cache_ttl=TTL)
+
+    repository.get_by_id("a")
+    repository.get_by_thread_id("t1")
+
+    assert fake.thread_reads == ["t1"]
+
+
+def test_thread_misses_are_not_cached(clock):
+    fake = _FakeMcpRepository(DOCS)
+    repository = repositories._CachingStrategyRepository([fake], cache_ttl=TTL)
+
+    assert repository.get_by_thread_id("t1") is None
+    assert repository.get_by_thread_id("t1") is None
+
+    assert fake.thread_reads == ["t1", "t1"]
+
+
+def test_thread_cache_expires_after_ttl(clock):
+    fake = _FakeMcpRepository(DOCS, thread_index={"t1": "a"})
+    repository = repositories._CachingStrategyRepository([fake], cache_ttl=TTL)
+
+    repository.get_by_thread_id("t1")
+    clock.now = TTL
+    repository.get_by_thread_id("t1")
+
+    assert fake.thread_reads == ["t1", "t1"]
+
+
+class _FakeFirestoreClient:
+    """Pooled client stand-in; instances are distinct like independent channels."""
+
+    project = "test-project"
+
+    def collection(self, name):
+        return (self, name)
+
+
+class _FakeMcpRepositoryFor(_FakeMcpRepository):
+    """MCP repository constructed for one client, as _initialize_repositories() does."""
+
+    def __init__(self, client):
+        super().__init__({})
+        self.client = client
+
+
+@pytest.fixture
+def initialize(monkeypatch):
+    """Run repository initialization against a fake MCP factory; returns its calls."""
+    calls = []
+
+    def init(factory):
+        class FirestoreClient:
+            @staticmethod
+            def get_client(project, database):
+                calls.append((project, database))
+                return factory()
+
+        monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "test-project")
+        monkeypatch.setenv("FIRESTORE_DATABASE", "strategy")
+        monkeypatch.setattr(repositories, "_import_mcp_modules", lambda: None)
+        monkeypatch.setattr(repositories, "_FirestoreClient", FirestoreClient)
+        monkeypatch.setattr(repositories, "_CardRepository", _FakeMcpRepositoryFor)
+        monkeypatch.setattr(repositories, "_StrategyRepository", _FakeMcpRepositoryFor)
+        monkeypatch.setattr(repositories, "_FIRESTORE_CLIENT_POOL_SIZE", 3)
+        for name in ("_firestore_client", "_firestore_clients", "_strategies_collections"):
+            monkeypatch.setattr(repositories, name, None)
+        monkeypatch.setattr(repositories, "_card_repository", None)
+        monkeypatch.setattr(repositories, "_strategy_repository", None)
+        repositories._initialize_repositories()
+        return calls
+
+    return init
+
+
+def _pooled_clients() -> set[int]:
+    return {id(repositories.get_firestore_client()) for _ in range(6)}
+
+
+def test_client_pool_is_built_through_mcp_factory(initialize):
+    calls = initialize(_FakeFirestoreClient)
+
+    assert calls == [("test-project", "strategy")] * 3
+    assert len(_pooled_clients()) == 3
+
+
+def test_shared_mcp_client_disables_pooling(initialize):
+    shared = _FakeFirestoreClient()
+    initialize(lambda: shared)
+
+    assert _pooled_clients() == {id(shared)}
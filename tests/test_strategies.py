@@ -0,0 +1,110 @@
+"""Tests for strategy response serialization in src.routes.strategies."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.auth import get_user_id_required
+from src.routes import strategies
+
+
+class _Attachment(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    card_id: str = Field(alias="cardId")
+    role: str = "entry"
+
+
+class _Strategy(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str
+    owner_id: str | None = Field(default=None, alias="ownerId")
+    thread_id: str | None = None
+    name: str = ""
+    status: str = "draft"
+    universe: list[str] = []
+    attachments: list[_Attachment] = []
+    version: int = 1
+    created_at: str = ""
+    updated_at: str = ""
+    secret: str = "internal"
+
+
+def _strategy() -> _Strategy:
+    return _Strategy(id="s1", owner_id="u1", attachments=[_Attachment(card_id="c1")])
+
+
+def test_json_response_uses_field_names_like_model_dump():
+    strategy = _strategy()
+    fields = strategies._strategy_field_filter(_Strategy)
+
+    response = strategies._json_response([strategy], include={"__all__": fields})
+
+    expected = strategy.model_dump(mode="json", include=fields)
+    assert json.loads(response.body) == [expected]
+    assert "ownerId" not in response.body.decode()
+    assert "cardId" not in response.body.decode()
+
+
+def test_strategy_with_cards_response_excludes_unexposed_fields():
+    strategy = _strategy()
+    cards = [{"id": "c1", "role": "entry"}]
+
+    body = json.loads(strategies._strategy_with_cards_response(strategy, cards).body)
+
+    assert body["strategy"] == strategy.model_dump(mode="json", exclude={"secret"})
+    assert body["cards"] == cards
+    assert body["card_count"] == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """App serving the strategy router with auth and Firestore stubbed out."""
+
+    async def fake_in_db(fn, /, *args, **kwargs):
+        return [_strategy()]
+
+    monkeypatch.setattr(strategies, "in_db", fake_in_db)
+    app = FastAPI()
+    app.include_router(strategies.router)
+    app.dependency_overrides[get_user_id_required] = lambda: "u1"
+    return TestClient(app)
+
+
+def test_msgpack_list_matches_json_list(client):
+    ormsgpack = pytest.importorskip("ormsgpack")
+    json_body = client.get("/api/strategies").json()
+    response = client.get("/api/strategies", headers={"Accept": "application/msgpack"})
+
+    assert response.headers["content-type"] == "application/msgpack"
+    assert ormsgpack.unpackb(response.content) == json_body
+    assert "ownerId" not in json_body[0]
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        ("application/msgpack", True),
+        ("application/json, application/msgpack", True),
+        ("application/msgpack, */*;q=0.1", True),
+        ("Application/MsgPack; Q=0.9, application/json;q=0.8", True),
+        ("", False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack;q=0", False),
+        ("application/msgpack;q=0.5, application/json", False),
+        ("application/x-msgpack", False),
+        ("application/msgpack;q=bogus", False),
+    ],
+)
+def test_wants_msgpack(accept, expected):
+    assert strategies._wants_msgpack(accept) is expected
+
+
+def test_msgpack_refused_with_zero_quality(client):
+    response = client.get("/api/strategies", headers={"Accept": "application/msgpack;q=0"})
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,200 @@
+"""Tests for thread listing in src.routes.threads and src.repositories."""
+
+import itertools
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.api_core.exceptions import FailedPrecondition
+
+from src import repositories
+from src.auth import get_user_id_required
+from src.routes import threads
+
+# Ordered query rows: (strategy_id, fields), most recently updated first
+ROWS = [
+    ("s3", {"thread_id": "t1", "name": "C", "status": "live", "updated_at": "2024-03"}),
+    ("s4", {"thread_id": None, "name": "D", "status": "draft", "updated_at": "2024-02"}),
+    ("s2", {"thread_id": "t2", "name": "B", "status": "draft", "updated_at": "2024-02"}),
+    ("s1", {"thread_id": "t1", "name": "A", "status": "draft", "updated_at": "2024-01"}),
+]
+
+
+def _strategy(strategy_id: str, fields: dict) -> SimpleNamespace:
+    return SimpleNamespace(id=strategy_id, created_at=None, **fields)
+
+
+class _FakeStrategyRepository:
+    """Full-scan fallback source: the same strategies as ROWS, in storage order."""
+
+    def __init__(self):
+        self.scans = []
+
+    def get_by_owner_id(self, owner_id):
+        self.scans.append(owner_id)
+        return [_strategy(strategy_id, fields) for strategy_id, fields in reversed(ROWS)]
+
+
+class _OrderedQuery:
+    """Fake get_owner_thread_rows(): records calls and how many rows were consumed."""
+
+    def __init__(self, rows=ROWS, error=None):
+        self.rows = rows
+        self.error = error
+        self.calls = 0
+        self.consumed = 0
+
+    def __call__(self, owner_id):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        for row in self.rows:
+            self.consumed += 1
+            yield row
+
+
+_MISSING_INDEX = FailedPrecondition("The query requires an index")
+
+
+@pytest.fixture
+def strategy_repository(monkeypatch):
+    repository = _FakeStrategyRepository()
+    monkeypatch.setattr(threads, "get_strategy_repository", lambda: repository)
+    monkeypatch.setattr(threads, "_ordered_query_retry_at", 0.0)
+    monkeypatch.setattr(threads, "_ordered_query_fallback_logged", False)
+    return repository
+
+
+def _use_ordered_query(monkeypatch, query: _OrderedQuery) -> _OrderedQuery:
+    monkeypatch.setattr(threads, "get_owner_thread_rows", query)
+    return query
+
+
+def _thread_ids(batch, limit=None) -> list[tuple[str, str]]:
+    return [(t["thread_id"], t["strategy_id"]) for t in json.loads(batch.to_json(limit))]
+
+
+def test_ordered_query_keeps_first_row_per_thread(monkeypatch, strategy_repository):
+    _use_ordered_query(monkeypatch, _OrderedQuery())
+
+    batch = threads._load_threads("u1", None)
+
+    assert _thread_ids(batch) == [("t1", "s3"), ("t2", "s2")]
+    assert strategy_repository.scans == []
+
+
+def test_ordered_query_stops_at_limit(monkeypatch, strategy_repository):
+    query = _use_ordered_query(monkeypatch, _OrderedQuery())
+
+    batch = threads._load_threads("u1", 1)
+
+    assert _thread_ids(batch, 1) == [("t1", "s3")]
+    assert query.consumed == 1
+
+
+def test_missing_index_falls_back_to_full_scan(monkeypatch, strategy_repository):
+    _use_ordered_query(monkeypatch, _OrderedQuery(error=_MISSING_INDEX))
+
+    batch = threads._load_threads("u1", None)
+
+    # Same threads as the ordered query, reduced client-side
+    assert _thread_ids(batch) == [("t1", "s3"), ("t2", "s2")]
+    assert strategy_repository.scans == ["u1"]
+
+
+def test_failure_while_streaming_falls_back_to_full_scan(monkeypatch, strategy_repository):
+    def rows_then_error(owner_id):
+        yield ROWS[0]
+        raise _MISSING_INDEX
+
+    monkeypatch.setattr(threads, "get_owner_thread_rows", rows_then_error)
+
+    batch = threads._load_threads("u1", None)
+
+    assert _thread_ids(batch) == [("t1", "s3"), ("t2", "s2")]
+    assert strategy_repository.scans == ["u1"]
+
+
+def test_missing_index_skips_ordered_query_until_retry(monkeypatch, strategy_repository, caplog):
+    query = _use_ordered_query(monkeypatch, _OrderedQuery(error=_MISSING_INDEX))
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(threads.time, "monotonic", lambda: clock.now)
+    caplog.set_level(logging.DEBUG, logger=threads.logger.name)
+
+    for _ in range(3):
+        threads._load_threads("u1", None)
+    assert query.calls == 1
+    assert len(strategy_repository.scans) == 3
+
+    # Once the retry window has passed, the ordered query is tried again
+    clock.now += threads._ORDERED_QUERY_RETRY_SECONDS
+    threads._load_threads("u1", None)
+    assert query.calls == 2
+
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "falling back to full scan" in warnings[0].getMessage()
+
+
+def test_index_deployed_after_fallback_uses_ordered_query(monkeypatch, strategy_repository):
+    _use_ordered_query(monkeypatch, _OrderedQuery(error=_MISSING_INDEX))
+    threads._load_threads("u1", None)
+
+    monkeypatch.setattr(threads, "_ordered_query_retry_at", 0.0)
+    query = _use_ordered_query(monkeypatch, _OrderedQuery())
+    threads._load_threads("u1", None)
+
+    assert query.calls == 1
+    assert strategy_repository.scans == ["u1"]
+
+
+def test_get_threads_honours_limit(monkeypatch, strategy_repository):
+    async def in_db(fn, /, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    _use_ordered_query(monkeypatch, _OrderedQuery())
+    monkeypatch.setattr(threads, "in_db", in_db)
+    app = FastAPI()
+    app.include_router(threads.router)
+    app.dependency_overrides[get_user_id_required] = lambda: "u1"
+
+    response = TestClient(app).get("/api/threads", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert [t["strategy_id"] for t in response.json()] == ["s3"]
+
+
+def test_owner_thread_rows_query(monkeypatch):
+    calls = []
+
+    class FakeQuery:
+        def where(self, filter):
+            calls.append(("where", filter.field_path, filter.op_string, filter.value))
+            return self
+
+        def order_by(self, field, direction):
+            calls.append(("order_by", field, direction))
+            return self
+
+        def select(self, fields):
+            calls.append(("select", list(fields)))
+            return self
+
+        def stream(self):
+            for strategy_id, fields in ROWS[:2]:
+                yield SimpleNamespace(id=strategy_id, to_dict=lambda fields=fields: fields)
+
+    monkeypatch.setattr(repositories, "_initialize_repositories", lambda: None)
+    monkeypatch.setattr(repositories, "_strategies_collections", itertools.cycle([FakeQuery()]))
+
+    rows = list(repositories.get_owner_thread_rows("u1"))
+
+    assert rows == ROWS[:2]
+    assert calls == [
+        ("where", "owner_id", "==", "u1"),
+        ("order_by", "updated_at", repositories.Query.DESCENDING),
+        ("select", ["thread_id", "name", "status", "created_at", "updated_at"]),
+    ]